@@ -0,0 +1,196 @@
+"""
+Runs Lurk against local fake stores with a large number of generated searches and reports how
+the cycle scales. Usage:
+
+    uv run python -m benchmarks.load_test --searches 1000 --latency-ms 80 --error-rate 0.01
+"""
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import socket
+import statistics
+import sys
+import time
+import typer
+
+from collections import Counter
+from collections.abc import Mapping
+from typing import Annotated, Any
+from curl_cffi import requests
+from rich import print
+from rich.table import Table
+
+from benchmarks.stores import StoreSettings, serve
+from lurk.checkers import checker
+from lurk.config import ClientConfig, Config
+from lurk.http_client import HttpClient
+from lurk.lurk import Lurk, SearchResult
+
+HOST = "127.0.0.1"
+
+app = typer.Typer()
+
+
+class TimedHttpClient(HttpClient):
+    """HttpClient that records the latency of every request it sends."""
+
+    def __init__(self, config: ClientConfig, latencies: list[float]):
+        super().__init__(config)
+        self._latencies = latencies
+
+    async def _fetch(
+        self,
+        method: requests.session.HttpMethod,
+        url: str,
+        headers: Mapping[str, str],
+        params: Mapping[str, str] | None,
+        body: Mapping[str, Any] | None,
+        cookies: Mapping[str, str] | None,
+    ) -> tuple[int, bool, bytes, str]:
+        start = time.perf_counter()
+        try:
+            return await super()._fetch(method, url, headers, params, body, cookies)
+        finally:
+            self._latencies.append(time.perf_counter() - start)
+
+
+class LoadTestLurk(Lurk):
+    """Lurk pointed at the fake stores, collecting results instead of notifying them."""
+
+    def __init__(self, config: Config, ports: dict[str, int]):
+        super().__init__(config)
+        self.latencies: list[float] = []
+        self.results: list[SearchResult] = []
+
+        self.AVAILABLE_CHECKERS = {
+            name: _with_base_url(checker_cls, f"http://{HOST}:{ports[name]}")
+            for name, checker_cls in self.AVAILABLE_CHECKERS.items()
+        }
+
+    def _make_http_client(self, checker_name: str) -> HttpClient:
+        return TimedHttpClient(self.config.client, self.latencies)
+
+    async def _report(self, results: list[SearchResult]) -> None:
+        self.results.extend(results)
+
+
+def _with_base_url(checker_cls: type[checker.Checker], base_url: str) -> type[checker.Checker]:
+    return type(checker_cls.__name__, (checker_cls,), {"base_url": base_url})
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def _serve_stores(settings: StoreSettings, ports: dict[str, int]) -> None:
+    asyncio.run(serve(settings, HOST, ports))
+
+
+def _wait_for_ports(ports: dict[str, int], timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    for port in ports.values():
+        while True:
+            try:
+                socket.create_connection((HOST, port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Fake store on port {port} did not start")
+                time.sleep(0.05)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _build_config(searches: int, search_timeout: float, cycle_timeout: float) -> Config:
+    return Config.model_validate(
+        {
+            "search": {
+                f"load-{i}": {"query": f"product {i}", "filters": {"categories": ["Hardware"]}}
+                for i in range(searches)
+            },
+            "run": {"search-timeout": search_timeout, "cycle-timeout": cycle_timeout},
+            # Every run uses new ports, so cookies would only pile up in the data dir
+            "client": {"persist-cookies": False},
+        }
+    )
+
+
+async def _run_cycles(lurk_app: LoadTestLurk, cycles: int, verbose: bool) -> list[float]:
+    cycle_times: list[float] = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            await lurk_app.run()
+        cycle_times.append(time.perf_counter() - start)
+    return cycle_times
+
+
+def _print_report(lurk_app: LoadTestLurk, cycle_times: list[float], searches: int) -> None:
+    latencies = lurk_app.latencies
+    total_time = sum(cycle_times)
+    statuses = Counter(str(r.status) for r in lurk_app.results)
+
+    table = Table(title=f"Load test: {searches} searches x {len(cycle_times)} cycles")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Cycle time (mean)", f"{statistics.fmean(cycle_times):.2f}s")
+    table.add_row("Cycle time (max)", f"{max(cycle_times):.2f}s")
+    table.add_row("Requests", str(len(latencies)))
+    table.add_row("Requests/sec", f"{len(latencies) / total_time:.1f}" if total_time else "-")
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100)
+        table.add_row("Request latency p50", f"{percentiles[49] * 1000:.1f}ms")
+        table.add_row("Request latency p99", f"{percentiles[98] * 1000:.1f}ms")
+    table.add_row("Peak RSS", f"{_peak_rss_mb():.1f}MB")
+    for status, count in sorted(statuses.items()):
+        table.add_row(f"Searches {status}", str(count))
+    print(table)
+
+
+@app.command()
+def main(
+    searches: Annotated[int, typer.Option(help="Number of generated searches")] = 500,
+    products: Annotated[int, typer.Option(help="Products returned by every search")] = 24,
+    latency_ms: Annotated[float, typer.Option(help="Mean latency of the fake stores")] = 50,
+    error_rate: Annotated[float, typer.Option(help="Share of requests that fail with a 500")] = 0.0,
+    cycles: Annotated[int, typer.Option(help="Number of cycles to run")] = 1,
+    search_timeout: Annotated[float, typer.Option(help="Timeout of every search")] = 60,
+    cycle_timeout: Annotated[float, typer.Option(help="Timeout of every cycle")] = 600,
+    seed: Annotated[int, typer.Option(help="Seed for the generated catalogs")] = 0,
+    verbose: Annotated[bool, typer.Option(help="Show Lurk's own output")] = False,
+) -> None:
+    """Run Lurk against fake stores and report cycle time, latency, memory and throughput."""
+    settings = StoreSettings(
+        products=products, latency_ms=latency_ms, error_rate=error_rate, seed=seed
+    )
+    ports = {"best-buy": _free_port(), "memory-express": _free_port()}
+
+    # The stores run in their own process so they don't skew Lurk's CPU and memory numbers
+    stores = multiprocessing.Process(target=_serve_stores, args=(settings, ports), daemon=True)
+    stores.start()
+    try:
+        _wait_for_ports(ports)
+        lurk_app = LoadTestLurk(_build_config(searches, search_timeout, cycle_timeout), ports)
+        cycle_times = asyncio.run(_run_cycles(lurk_app, cycles, verbose))
+    finally:
+        stores.terminate()
+        stores.join()
+
+    _print_report(lurk_app, cycle_times, searches)
+
+
+if __name__ == "__main__":
+    app()
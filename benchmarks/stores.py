@@ -0,0 +1,134 @@
+"""
+Fake versions of the supported stores, serving synthetic catalogs with configurable latency and
+error rates. Only the routes used by the checkers are implemented.
+"""
+
+import asyncio
+import hashlib
+import random
+
+from dataclasses import dataclass
+from html import escape
+from aiohttp import web
+from aiohttp.typedefs import Handler
+
+
+@dataclass
+class StoreSettings:
+    products: int = 24
+    latency_ms: float = 50
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def _skus(query: str, count: int, seed: int) -> list[str]:
+    digest = hashlib.blake2b(f"{seed}:{query}".encode(), digest_size=4).hexdigest()
+    return [f"{int(digest, 16) % 10_000_000 + i:08d}" for i in range(count)]
+
+
+def _price(sku: str) -> float:
+    return 100 + int(sku) % 1900 + 0.99
+
+
+def _in_stock(sku: str) -> bool:
+    return int(sku) % 3 == 0
+
+
+@web.middleware
+async def _chaos_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    settings: StoreSettings = request.app["settings"]
+    if settings.latency_ms:
+        await asyncio.sleep(random.expovariate(1000 / settings.latency_ms))
+    if random.random() < settings.error_rate:
+        return web.Response(status=500, text="Internal Server Error")
+    return await handler(request)
+
+
+async def _best_buy_search(request: web.Request) -> web.Response:
+    settings: StoreSettings = request.app["settings"]
+    query = request.query.get("query", "")
+    products = [
+        {
+            "sku": sku,
+            "productUrl": f"/en-ca/product/{sku}",
+            "name": f"{query} #{sku}",
+            "shortDescription": f"Synthetic product {sku} for '{query}'",
+            "salePrice": _price(sku),
+        }
+        for sku in _skus(query, settings.products, settings.seed)
+    ]
+    return web.json_response({"products": products, "total": len(products)})
+
+
+async def _best_buy_availability(request: web.Request) -> web.Response:
+    skus = [s for s in request.query.get("skus", "").split("|") if s]
+    availabilities = [
+        {
+            "sku": sku,
+            "pickup": {"purchasable": _in_stock(sku)},
+            "shipping": {"purchasable": False},
+        }
+        for sku in skus
+    ]
+    return web.json_response({"availabilities": availabilities})
+
+
+MEMORY_EXPRESS_ITEM = """
+<div class="c-shca-icon-item">
+  <div class="c-shca-icon-item__body-image"><a href="/Products/{sku}">img</a></div>
+  <div class="c-shca-icon-item__body-name">{name}</div>
+  <div class="c-shca-icon-item__body-ref"><span>{sku}</span></div>
+  <div class="c-shca-icon-item__body-inventory">{inventory}</div>
+  <div class="c-shca-icon-item__summary-list"><span>${price:,.2f}</span></div>
+</div>
+"""
+
+
+async def _memory_express_category(request: web.Request) -> web.Response:
+    settings: StoreSettings = request.app["settings"]
+    query = request.query.get("Search", "")
+    items = "".join(
+        MEMORY_EXPRESS_ITEM.format(
+            sku=sku,
+            name=escape(f"{query} #{sku}"),
+            inventory="In Stock" if _in_stock(sku) else "Out of Stock",
+            price=_price(sku),
+        )
+        for sku in _skus(query, settings.products, settings.seed)
+    )
+    return web.Response(
+        text=f"<html><body><div class='c-shca-results'>{items}</div></body></html>",
+        content_type="text/html",
+    )
+
+
+def best_buy_app(settings: StoreSettings) -> web.Application:
+    app = web.Application(middlewares=[_chaos_middleware])
+    app["settings"] = settings
+    app.router.add_get("/api/v2/json/search", _best_buy_search)
+    app.router.add_get("/ecomm-api/availability/products", _best_buy_availability)
+    return app
+
+
+def memory_express_app(settings: StoreSettings) -> web.Application:
+    app = web.Application(middlewares=[_chaos_middleware])
+    app["settings"] = settings
+    app.router.add_get("/Category/{category}", _memory_express_category)
+    return app
+
+
+async def serve(settings: StoreSettings, host: str, ports: dict[str, int]) -> None:
+    """Serve both fake stores until cancelled."""
+    random.seed(settings.seed)
+    runners: list[web.AppRunner] = []
+    apps = {"best-buy": best_buy_app, "memory-express": memory_express_app}
+    try:
+        for name, make_app in apps.items():
+            runner = web.AppRunner(make_app(settings), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, host, ports[name], backlog=4096).start()
+            runners.append(runner)
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
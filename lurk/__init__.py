@@ -0,0 +1,4 @@
+import time
+
+# Taken as early as possible so `lurk run --profile` can report how long startup took
+STARTED_AT = time.perf_counter()
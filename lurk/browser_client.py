@@ -0,0 +1,212 @@
+import asyncio
+
+from nodriver import cdp
+from nodriver.core.browser import Browser  # type: ignore[import-untyped]
+from nodriver.core.tab import Tab  # type: ignore[import-untyped]
+from nodriver.core.util import start  # type: ignore[import-untyped]
+from urllib.parse import urlencode
+from typing import Any, Self
+from collections.abc import Mapping
+from http.cookiejar import CookieJar
+from curl_cffi import requests
+from rich import print
+
+from lurk.config import BrowserConfig, ClientConfig
+from lurk.http_client import HttpClient
+
+
+class PooledTab:
+    """A browser tab that keeps track of the state of the page it's currently loading."""
+
+    def __init__(self, tab: Tab) -> None:
+        self.tab = tab
+        self.pages_served = 0
+        self.status_code: int | None = None
+        self.loaded = asyncio.Event()
+
+    async def setup(self, blocked_resources: list[str]) -> None:
+        self.tab.add_handler(cdp.network.ResponseReceived, self._on_response)
+        self.tab.add_handler(cdp.page.LoadEventFired, self._on_load)
+        await self.tab.send(cdp.network.enable())
+        await self.tab.send(cdp.page.enable())
+
+        if blocked_resources:
+            self.tab.add_handler(cdp.fetch.RequestPaused, self._on_request_paused)
+            await self.tab.send(
+                cdp.fetch.enable(
+                    patterns=[
+                        cdp.fetch.RequestPattern(resource_type=cdp.network.ResourceType(r))
+                        for r in blocked_resources
+                    ]
+                )
+            )
+
+    def _on_response(self, event: cdp.network.ResponseReceived) -> None:
+        if event.type_ == cdp.network.ResourceType.DOCUMENT and self.status_code is None:
+            self.status_code = event.response.status
+
+    def _on_load(self, _: cdp.page.LoadEventFired) -> None:
+        self.loaded.set()
+
+    def _on_request_paused(self, event: cdp.fetch.RequestPaused) -> None:
+        # Only the blocked resource types are intercepted, so every paused request gets dropped.
+        # Handlers run inside the tab's listener, which is also what reads command replies, so
+        # awaiting the reply here would block the tab for good
+        self.tab.feed_cdp(
+            cdp.fetch.fail_request(event.request_id, cdp.network.ErrorReason.BLOCKED_BY_CLIENT)
+        )
+
+
+class TabPool:
+    """
+    Bounded pool of warm tabs of a single headless browser. The browser is started on the
+    first request and tabs are recycled after serving a number of pages to cap memory usage.
+    """
+
+    def __init__(self, config: BrowserConfig) -> None:
+        self._config = config
+        self._browser: Browser | None = None
+        self._idle: asyncio.Queue[PooledTab] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(config.pool_size)
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.close()
+
+    async def _get_browser(self) -> Browser:
+        async with self._lock:
+            if self._browser is None:
+                print("Starting headless browser")
+                self._browser = await start(headless=self._config.headless)
+            return self._browser
+
+    async def _new_tab(self) -> PooledTab:
+        browser = await self._get_browser()
+        tab = PooledTab(await browser.get("about:blank", new_tab=True))
+        await tab.setup(list(self._config.blocked_resources))
+        return tab
+
+    async def acquire(self) -> PooledTab:
+        await self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        try:
+            return await self._new_tab()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, tab: PooledTab) -> None:
+        try:
+            if tab.pages_served >= self._config.max_pages_per_tab:
+                print(f"Recycling browser tab after {tab.pages_served} pages")
+                await tab.tab.close()
+            else:
+                self._idle.put_nowait(tab)
+        finally:
+            self._slots.release()
+
+    async def discard(self, tab: PooledTab) -> None:
+        """Close a tab that was left in an unknown state instead of returning it to the pool."""
+        try:
+            await tab.tab.close()
+        except Exception as e:
+            print(f"Failed to close browser tab: {e}")
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        if self._browser is None:
+            return
+        self._browser.stop()
+        self._browser = None
+        self._idle = asyncio.Queue()
+
+
+class BrowserHttpClient(HttpClient):
+    """
+    HttpClient that loads pages in a headless browser, for stores that need JavaScript to
+    render their content. Only GET requests are supported.
+    """
+
+    def __init__(self, config: ClientConfig, pool: TabPool):
+        self.base_url: str | None = None
+        self._config = config
+        self._pool = pool
+
+    @property
+    def cookie_jar(self) -> CookieJar | None:
+        # Cookies live in the browser profile
+        return None
+
+    async def close(self) -> None:
+        # The pool is shared between clients, so it's closed by whoever created it
+        pass
+
+    async def _fetch(
+        self,
+        method: requests.session.HttpMethod,
+        url: str,
+        headers: Mapping[str, str],
+        params: Mapping[str, str] | None,
+        body: Mapping[str, Any] | None,
+        cookies: Mapping[str, str] | None,
+    ) -> tuple[int, bool, bytes, str]:
+        if method != "GET":
+            raise ValueError(f"The browser backend only supports GET requests, got {method}")
+        if body:
+            raise ValueError("The browser backend does not support request bodies")
+
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        pooled = await self._pool.acquire()
+        try:
+            status_code, content = await self._load(pooled, url, headers, cookies)
+        except BaseException:
+            await self._pool.discard(pooled)
+            raise
+        await self._pool.release(pooled)
+
+        return status_code, 200 <= status_code < 400, content.encode(), "utf-8"
+
+    async def _load(
+        self,
+        pooled: PooledTab,
+        url: str,
+        headers: Mapping[str, str],
+        cookies: Mapping[str, str] | None,
+    ) -> tuple[int, str]:
+        browser_config = self._config.browser
+        tab = pooled.tab
+
+        await tab.send(cdp.network.set_extra_http_headers(cdp.network.Headers(headers)))
+        for name, value in (cookies or {}).items():
+            await tab.send(cdp.network.set_cookie(name, value, url=url))
+
+        pooled.status_code = None
+        pooled.loaded.clear()
+        pooled.pages_served += 1
+        # Navigating directly instead of with Tab.get, which drops the navigation error
+        _, _, error_text, *_ = await tab.send(cdp.page.navigate(url))
+        if error_text:
+            raise ConnectionError(f"Failed to load {url}: {error_text}")
+
+        try:
+            await asyncio.wait_for(pooled.loaded.wait(), browser_config.load_timeout)
+        except TimeoutError:
+            print(f"Page {url} did not finish loading, using what was rendered so far")
+
+        # Without a document response the tab is showing an error page, not the store's
+        if pooled.status_code is None:
+            raise ConnectionError(f"No response received for {url}")
+
+        await tab.sleep(browser_config.render_delay)
+        content: str = await tab.get_content()
+        return pooled.status_code, content
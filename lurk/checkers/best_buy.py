@@ -7,6 +7,7 @@ from lurk.models import Product
 from lurk.checkers.checker import Checker
 from lurk.http_client import HttpClient
 from lurk.config import SearchFilters
+from lurk.profiling import profiler
 
 
 class BestBuyRoutes(StrEnum):
@@ -51,14 +52,15 @@ class BestBuyChecker(Checker):
         products: list[Product] = []
         raw_products = await self._search_products(search, filters)
 
-        for p in raw_products:
-            try:
-                product = self._parse_product(p)  # type: ignore
-            except ValidationError as e:
-                print(f"Couldn't parse product {p}. Error: {e}")
-                continue
+        with profiler.phase("parsing: best-buy"):
+            for p in raw_products:
+                try:
+                    product = self._parse_product(p)  # type: ignore
+                except ValidationError as e:
+                    print(f"Couldn't parse product {p}. Error: {e}")
+                    continue
 
-            products.append(product)
+                products.append(product)
 
         stocks = await self._fetch_products([p.sku for p in products], filters)
 
@@ -6,6 +6,7 @@ from lurk.http_client import HttpClient, TextResponse
 from lurk.checkers.checker import Checker
 from lurk.config import SearchFilters
 from lurk.models import Product
+from lurk.profiling import profiler
 from rich import print
 
 
@@ -32,7 +33,8 @@ class MemoryExpressChecker(Checker):
         self.validate_filters(filters)
 
         resp = await self._fetch_products(search, filters)
-        products = await self._parse_products(resp)
+        with profiler.phase("parsing: memory-express"):
+            products = await self._parse_products(resp)
         return await self._filter_products(products, filters)
 
     async def _fetch_products(self, search: str, filters: SearchFilters) -> TextResponse:
@@ -1,4 +1,5 @@
 import asyncio
+import time
 import typer
 
 from pathlib import Path
@@ -6,8 +7,10 @@ from typing import Annotated
 from dataclasses import dataclass
 from rich import print
 
+from lurk import STARTED_AT
 from lurk.config import Config, parse_config
 from lurk.lurk import Lurk
+from lurk.profiling import profiler
 
 app = typer.Typer(no_args_is_help=True)
 
@@ -15,14 +18,49 @@ app = typer.Typer(no_args_is_help=True)
 @dataclass
 class AppState:
     config: Config
+    config_path: Path
+    startup_time: float
+    parse_config_time: float
 
 
 @app.command()
-def run(ctx: typer.Context) -> None:
+def run(
+    ctx: typer.Context,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch",
+            "-w",
+            help="Keep running the searches on their intervals, reloading the config file when it changes",
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Print how much time is spent in each phase of every cycle"),
+    ] = False,
+    profile_output: Annotated[
+        Path | None,
+        typer.Option(
+            help="Write cProfile stats of the first cycle to this file. Implies --profile",
+            dir_okay=False,
+            writable=True,
+            resolve_path=True,
+        ),
+    ] = None,
+) -> None:
     """Run the product checkers using the specified config."""
     state: AppState = ctx.obj
-    lurk_app = Lurk(state.config)
-    asyncio.run(lurk_app.run())
+    if profile or profile_output:
+        profiler.enabled = True
+        profiler.dump_path = profile_output
+        profiler.add("startup", state.startup_time)
+        profiler.add("parse_config", state.parse_config_time)
+
+    lurk_app = Lurk(state.config, state.config_path)
+    if watch:
+        asyncio.run(lurk_app.watch())
+    else:
+        asyncio.run(lurk_app.run())
 
 @app.command()
 def validate(ctx: typer.Context) -> None:
@@ -48,8 +86,15 @@ def callback(
         ),
     ] = Path("lurk.yaml"),
 ) -> None:
+    startup_time = time.perf_counter() - STARTED_AT
+    start = time.perf_counter()
     cfg = parse_config(config)
-    ctx.obj = AppState(config=cfg)
+    ctx.obj = AppState(
+        config=cfg,
+        config_path=config,
+        startup_time=startup_time,
+        parse_config_time=time.perf_counter() - start,
+    )
 
 
 if __name__ == "__main__":
@@ -26,8 +26,10 @@ class SearchConfig(BaseConfigModel):
 
     query: str
     filters: SearchFilters | None = None
-    notify: Literal["availability", "deal"] = "availability"  # TODO
+    notify: Literal["availability", "deal"] = "availability"
     enabled: bool = True
+    timeout: Annotated[float, Field(gt=0)] | None = None
+    interval: Annotated[float, Field(gt=0)] | None = None
 
 
 class CheckerSearchConfig(SearchConfig):
@@ -39,6 +41,20 @@ class CheckerConfig(BaseConfigModel):
 
     enabled: bool = True
     search: dict[str, CheckerSearchConfig] = {}
+    backend: Literal["curl", "browser"] = "curl"
+
+
+class BrowserConfig(BaseConfigModel):
+    """Headless browser settings, used by checkers with the 'browser' backend."""
+
+    headless: bool = True
+    pool_size: Annotated[int, Field(gt=0)] = 2
+    max_pages_per_tab: Annotated[int, Field(gt=0)] = 50
+    load_timeout: Annotated[float, Field(gt=0)] = 15
+    render_delay: Annotated[float, Field(ge=0)] = 0.5
+    blocked_resources: list[
+        Literal["Image", "Media", "Font", "Stylesheet", "TextTrack", "Manifest", "Ping"]
+    ] = ["Image", "Media", "Font"]
 
 
 class ClientConfig(BaseConfigModel):
@@ -46,6 +62,30 @@ class ClientConfig(BaseConfigModel):
 
     random_useragent: bool = False  # TODO
     headers: dict[str, str] = {}
+    debug: bool = False
+    persist_cookies: bool = True
+    browser: Annotated[BrowserConfig, Field(default_factory=BrowserConfig)]
+
+
+class RunConfig(BaseConfigModel):
+    """Settings for each checking cycle."""
+
+    interval: Annotated[float, Field(gt=0)] = 300
+    search_timeout: Annotated[float, Field(gt=0)] | None = 60
+    cycle_timeout: Annotated[float, Field(gt=0)] | None = 300
+
+
+class DealConfig(BaseConfigModel):
+    """Settings used to decide if a price is a deal, for searches with 'notify: deal'."""
+
+    # Number of past prices kept per product
+    window: Annotated[int, Field(gt=0)] = 90
+    # A product needs this many past prices before it can be considered a deal
+    min_samples: Annotated[int, Field(gt=0)] = 5
+    # Deal if the price is below this percentile of the past prices
+    percentile: Annotated[float, Field(gt=0, le=100)] = 10
+    # Deal if the price is this fraction (or more) below the median of the past prices
+    drop_threshold: Annotated[float, Field(gt=0, lt=1)] | None = 0.15
 
 
 class Config(BaseConfigModel):
@@ -54,6 +94,9 @@ class Config(BaseConfigModel):
     search: Annotated[dict[str, SearchConfig], Field(min_length=1)]
     checkers: dict[str, CheckerConfig] = {}
     client: Annotated[ClientConfig, Field(default_factory=ClientConfig)]
+    run: Annotated[RunConfig, Field(default_factory=RunConfig)]
+    deals: Annotated[DealConfig, Field(default_factory=DealConfig)]
+    data_dir: Annotated[Path, Field(default_factory=lambda: Path.home() / ".lurk")]
 
     @model_validator(mode="after")
     def validate_checkers_search(self) -> Self:
@@ -77,6 +120,11 @@ def parse_config(path: Path) -> Config:
     with open(path, "r", encoding="utf-8") as file:
         try:
             config_data = yaml.safe_load(file) or {}
+            if not isinstance(config_data, dict):
+                raise ValueError(
+                    "Your configuration is not valid. It must be a mapping of settings,"
+                    f" got: {config_data!r}"
+                )
             config = Config(**config_data)
         except ValidationError as e:
             raise ValueError(f"Your configuration is not valid. Here is the error:\n{e}")
@@ -0,0 +1,66 @@
+import hashlib
+import os
+
+from http.cookiejar import LoadError, MozillaCookieJar
+from pathlib import Path
+from urllib.parse import urlsplit
+from rich import print
+
+from lurk.http_client import HttpClient
+
+
+class CookieStore:
+    """
+    Keeps the cookies of each host and client identity on disk, so every run continues the
+    session of the previous one instead of showing up as a new visitor. Cookies are stored in
+    the Netscape cookies.txt format, which keeps their expiry, and expired cookies are dropped.
+    """
+
+    DIR_NAME = "cookies"
+
+    def __init__(self, data_dir: Path) -> None:
+        self.path = data_dir.expanduser() / self.DIR_NAME
+
+    def _path_for(self, client: HttpClient) -> Path | None:
+        if client.base_url is None:
+            return None
+        host = urlsplit(client.base_url).netloc
+        identity = hashlib.sha1(client.identity.encode()).hexdigest()[:12]
+        return self.path / f"{host}-{identity}.txt"
+
+    def load(self, client: HttpClient) -> None:
+        jar = client.cookie_jar
+        path = self._path_for(client)
+        if jar is None or path is None or not path.exists():
+            return
+
+        stored = MozillaCookieJar()
+        try:
+            stored.load(str(path), ignore_discard=True)
+        except (LoadError, OSError) as e:
+            print(f"Ignoring unreadable cookie file {path}: {e}")
+            return
+
+        for cookie in stored:
+            jar.set_cookie(cookie)
+        print(f"Loaded {len(stored)} cookies from {path}")
+
+    def save(self, client: HttpClient) -> None:
+        jar = client.cookie_jar
+        path = self._path_for(client)
+        if jar is None or path is None:
+            return
+
+        stored = MozillaCookieJar()
+        for cookie in jar:
+            stored.set_cookie(cookie)
+        stored.clear_expired_cookies()
+
+        # Written to a temporary file first so a crash never leaves a half-written jar behind
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            stored.save(str(tmp_path), ignore_discard=True)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to save cookies to {path}: {e}")
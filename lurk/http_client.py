@@ -1,31 +1,41 @@
 import asyncio
 
-from pydantic.dataclasses import dataclass
-from json import JSONDecodeError
+from dataclasses import dataclass
+from http.cookiejar import CookieJar
 from typing import Self, Any, cast, Union, overload, Literal
 from curl_cffi import requests
 from lurk.config import ClientConfig
+from lurk.profiling import profiler
 from collections.abc import Mapping
 
 from rich import print
 
+try:
+    # orjson is optional, it decodes large payloads noticeably faster than the stdlib
+    from orjson import loads as json_loads, JSONDecodeError  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    from json import loads as json_loads, JSONDecodeError  # type: ignore[assignment, unused-ignore]
+
 JsonResponse = dict[str, Any]
 
-@dataclass
+
+# Responses are plain dataclasses on purpose: payloads can be large, so they are not validated
+# or copied. The raw body is only kept when the client is in debug mode.
+@dataclass(slots=True)
 class JsonApiResponse:
     status_code: int
     content: JsonResponse
     ok: bool
-    raw: str
+    raw: bytes | None
     is_json: Literal[True]
 
 
-@dataclass
+@dataclass(slots=True)
 class TextResponse:
     status_code: int
     content: str
     ok: bool
-    raw: str
+    raw: bytes | None
     is_json: Literal[False]
 
 
@@ -33,11 +43,25 @@ Response = Union[JsonApiResponse, TextResponse]
 
 
 class HttpClient:
+    IMPERSONATE: requests.BrowserTypeLiteral = "chrome"
+
     def __init__(self, config: ClientConfig):
         self.base_url: str | None = None
-        self.session = requests.AsyncSession(impersonate="chrome")
+        self.session = requests.AsyncSession(impersonate=self.IMPERSONATE)
         self._config = config
 
+    @property
+    def identity(self) -> str:
+        """What the client looks like to the stores, cookies are only reused for the same one."""
+        user_agent = next(
+            (v for k, v in self._config.headers.items() if k.lower() == "user-agent"), ""
+        )
+        return f"{self.IMPERSONATE}|{user_agent}"
+
+    @property
+    def cookie_jar(self) -> CookieJar | None:
+        return self.session.cookies.jar
+
     async def __aenter__(self) -> Self:
         return self
 
@@ -51,6 +75,26 @@ class HttpClient:
         self.base_url = url.rstrip("/")
         return self
 
+    async def _fetch(
+        self,
+        method: requests.session.HttpMethod,
+        url: str,
+        headers: Mapping[str, str],
+        params: Mapping[str, str] | None,
+        body: Mapping[str, Any] | None,
+        cookies: Mapping[str, str] | None,
+    ) -> tuple[int, bool, bytes, str]:
+        """Perform the request and return its status code, ok flag, body and body encoding."""
+        resp = await self.session.request(
+            method,
+            url,
+            params=cast(dict[str, str], params),
+            headers=cast(dict[str, str], headers),
+            json=cast(dict[str, str], body),
+            cookies=cast(dict[str, str], cookies),
+        )
+        return resp.status_code, resp.ok, resp.content, resp.encoding
+
     async def _make_request(
         self,
         method: requests.session.HttpMethod,
@@ -63,49 +107,51 @@ class HttpClient:
     ) -> Response:
         assert self.base_url is not None, "Please set the base url"
         route = f"/{route}" if not route.startswith("/") else route
-        res_headers = self._config.headers
+        res_headers = dict(self._config.headers)
         if headers:
             res_headers.update(headers)
         print(
             f"Making request to {self.base_url + route} with {body=} headers={res_headers} {params=} {cookies=}"
         )
-        resp = await self.session.request(
-            method,
-            self.base_url + route,
-            params=cast(dict[str, str], params),
-            headers=res_headers,
-            json=cast(dict[str, str], body),
-            cookies=cast(dict[str, str], cookies),
-        )
-        print(f"Received response with status {resp.status_code}")
+        with profiler.phase(f"network: {self.base_url}"):
+            status_code, ok, body_bytes, encoding = await self._fetch(
+                method, self.base_url + route, res_headers, params, body, cookies
+            )
+        print(f"Received response with status {status_code} ({len(body_bytes)} bytes)")
 
-        raw_text = resp.text
+        debug = self._config.debug
+        if debug:
+            print(f"Response body: {body_bytes[:500].decode(encoding, errors='replace')}...")
 
         if expect_json:
             try:
-                data = resp.json()
-                print(f"Response body (JSON): {raw_text[:500]}...")
-                # TODO: replace this dumb sleep with a proper rate limiting method like a request queue
-                await asyncio.sleep(1)
-                return JsonApiResponse(
-                    status_code=resp.status_code,
-                    ok=resp.ok,
-                    content=data,
-                    raw=raw_text,
-                    is_json=True,
-                )
+                with profiler.phase("decoding"):
+                    data = json_loads(body_bytes)
             except JSONDecodeError:
-                print(f"Expected JSON but received non-JSON content: {raw_text[:100]}...")
+                preview = body_bytes[:100].decode(encoding, errors="replace")
+                print(f"Expected JSON but received non-JSON content: {preview}...")
                 raise ValueError("Expected JSON response but got non-JSON content")
+            # TODO: replace this dumb sleep with a proper rate limiting method like a request queue
+            with profiler.phase("rate limit sleep"):
+                await asyncio.sleep(1)
+            return JsonApiResponse(
+                status_code=status_code,
+                ok=ok,
+                content=data,
+                raw=body_bytes if debug else None,
+                is_json=True,
+            )
         else:
-            print(f"Response body (text): {raw_text[:500]}...")
+            with profiler.phase("decoding"):
+                text = body_bytes.decode(encoding, errors="replace")
             # TODO: replace this dumb sleep with a proper rate limiting method like a request queue
-            await asyncio.sleep(1)
+            with profiler.phase("rate limit sleep"):
+                await asyncio.sleep(1)
             return TextResponse(
-                status_code=resp.status_code,
-                ok=resp.ok,
-                content=raw_text,
-                raw=raw_text,
+                status_code=status_code,
+                ok=ok,
+                content=text,
+                raw=body_bytes if debug else None,
                 is_json=False,
             )
 
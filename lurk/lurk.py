@@ -1,81 +1,441 @@
 import asyncio
 import itertools
+import time
 
+import yaml
+
+from dataclasses import dataclass, field
+from enum import StrEnum
+from pathlib import Path
 from typing import Any
 from rich import print
+from rich.table import Table
 
-from lurk.config import Config, CheckerConfig, SearchConfig
+from lurk.config import Config, CheckerConfig, SearchConfig, parse_config
 from lurk.checkers import best_buy, checker, memory_express
 from lurk.models import Product
 from lurk.http_client import HttpClient
+from lurk.browser_client import BrowserHttpClient, TabPool
+from lurk.cookie_jar import CookieStore
+from lurk.price_history import PriceHistory
+from lurk.profiling import profiler
 from lurk.notifiers.telegram import TelegramNotifier
 
+
+class SearchStatus(StrEnum):
+    OK = "ok"
+    TIMEOUT = "timeout"
+    ERROR = "error"
+
+
+@dataclass
+class PlannedSearch:
+    checker_name: str
+    search_id: str
+    config: SearchConfig
+
+
+@dataclass
+class SearchResult:
+    search: PlannedSearch
+    status: SearchStatus
+    elapsed: float
+    products: list[Product] = field(default_factory=list)
+    error: BaseException | None = None
+
+
+SearchKey = tuple[str, str]
+
+
+def _search_key(search: PlannedSearch) -> SearchKey:
+    return search.checker_name, search.search_id
+
+
 class Lurk:
-    def __init__(self, config: Config):
+    CONFIG_POLL_INTERVAL: float = 2
+
+    def __init__(self, config: Config, config_path: Path | None = None):
         self.config = config
+        self.config_path = config_path
 
         self.AVAILABLE_CHECKERS: dict[str, type[checker.Checker]] = {
             "best-buy": best_buy.BestBuyChecker,
             "memory-express": memory_express.MemoryExpressChecker,
         }
 
+        # Clients are kept between cycles so sessions stay warm in watch mode
+        self._http_clients: dict[str, HttpClient] = {}
+        self._checkers: dict[str, checker.Checker] = {}
+        self._tab_pool: TabPool | None = None
+        self._price_history: PriceHistory | None = None
+        self._cookie_store = CookieStore(config.data_dir)
+
+        self._plan: dict[SearchKey, PlannedSearch] = {}
+        self._schedule: dict[SearchKey, float] = {}
+        # A reloaded config and the plan built while validating it, applied between cycles
+        self._pending_config: tuple[Config, list[PlannedSearch]] | None = None
+        self._wake = asyncio.Event()
+
     async def run(self) -> None:
-        tasks: list[asyncio.Task[list[Product]]] = []
+        """Run every search once."""
+        with profiler.cycle():
+            with profiler.phase("search plan"):
+                plan = self._build_plan(self.config)
+            try:
+                results = await self._run_searches(plan)
+            finally:
+                await self.close()
+
+            await self._report(results)
+
+    async def watch(self) -> None:
+        """
+        Keep running every search on its interval. If the config file changes, it's reloaded
+        and only the searches that changed are started, stopped or rescheduled.
+        """
+        loop = asyncio.get_running_loop()
+        with profiler.phase("search plan"):
+            self._plan = {_search_key(s): s for s in self._build_plan(self.config)}
+        self._schedule = dict.fromkeys(self._plan, loop.time())
+
+        watcher = asyncio.create_task(self._watch_config()) if self.config_path else None
+        try:
+            while True:
+                if self._pending_config is not None:
+                    await self._apply_config(*self._pending_config)
+                    self._pending_config = None
+
+                now = loop.time()
+                due = [self._plan[key] for key, at in self._schedule.items() if at <= now]
+                if due:
+                    with profiler.cycle():
+                        results = await self._run_searches(due)
+                        self._save_cookies()
+                        finished = loop.time()
+                        for r in results:
+                            key = _search_key(r.search)
+                            if key in self._schedule:
+                                self._schedule[key] = finished + self._interval(
+                                    r.search, self.config
+                                )
+                        await self._report(results)
+                    continue
+
+                next_run = min(self._schedule.values(), default=None)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wake.wait(), None if next_run is None else next_run - now
+                    )
+                except TimeoutError:
+                    pass
+        finally:
+            if watcher:
+                watcher.cancel()
+                await asyncio.gather(watcher, return_exceptions=True)
+            await self.close()
+
+    async def close(self) -> None:
+        for checker_name in list(self._http_clients):
+            await self._close_checker(checker_name)
+        if self._tab_pool is not None:
+            await self._tab_pool.close()
+            self._tab_pool = None
+
+    async def _report(self, results: list[SearchResult]) -> None:
+        self._print_summary(results)
+
+        found_products = list(itertools.chain.from_iterable(r.products for r in results))
+        print(f"{found_products=}")
+        with profiler.phase("notification"):
+            await TelegramNotifier().notify(self._select_notifications(results))
+
+    def _select_notifications(self, results: list[SearchResult]) -> list[Product]:
+        """
+        Pick the in stock products to notify about. Products of 'deal' searches are only picked
+        if their price is a deal compared to their price history.
+        """
+        to_notify: list[Product] = []
+        seen: set[str] = set()
+        for r in results:
+            deal_search = r.search.config.notify == "deal"
+            for product in r.products:
+                if not deal_search:
+                    if product.in_stock:
+                        to_notify.append(product)
+                    continue
+
+                key = f"{r.search.checker_name}:{product.sku}"
+                # Products can show up in multiple searches, only record their price once
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                price_history = self._get_price_history()
+                if product.in_stock and price_history.is_deal(key, product.price):
+                    to_notify.append(product)
+                price_history.record(key, product.price)
+
+        if self._price_history is not None:
+            self._price_history.flush()
+        return to_notify
+
+    def _get_price_history(self) -> PriceHistory:
+        if self._price_history is None:
+            self._price_history = PriceHistory(self.config.data_dir, self.config.deals)
+            self._price_history.load()
+        return self._price_history
+
+    def _get_checker(self, checker_name: str) -> checker.Checker:
+        if checker_instance := self._checkers.get(checker_name):
+            return checker_instance
+
+        http_client = self._make_http_client(checker_name)
+        checker_instance = self.AVAILABLE_CHECKERS[checker_name](http_client)
+        if self.config.client.persist_cookies:
+            self._cookie_store.load(http_client)
+        self._http_clients[checker_name] = http_client
+        self._checkers[checker_name] = checker_instance
+        return checker_instance
+
+    def _make_http_client(self, checker_name: str) -> HttpClient:
+        if self.config.checkers[checker_name].backend == "browser":
+            if self._tab_pool is None:
+                self._tab_pool = TabPool(self.config.client.browser)
+            return BrowserHttpClient(self.config.client, self._tab_pool)
+        return HttpClient(self.config.client)
+
+    async def _close_checker(self, checker_name: str) -> None:
+        self._checkers.pop(checker_name, None)
+        if http_client := self._http_clients.pop(checker_name, None):
+            if self.config.client.persist_cookies:
+                self._cookie_store.save(http_client)
+            await http_client.close()
 
+    def _save_cookies(self) -> None:
+        if not self.config.client.persist_cookies:
+            return
+        for http_client in self._http_clients.values():
+            self._cookie_store.save(http_client)
+
+    async def _watch_config(self) -> None:
+        assert self.config_path is not None
+        last_mtime = self.config_path.stat().st_mtime_ns
+
+        while True:
+            await asyncio.sleep(self.CONFIG_POLL_INTERVAL)
+            try:
+                mtime = self.config_path.stat().st_mtime_ns
+            except OSError as e:
+                print(f"Couldn't read config file {self.config_path}: {e}")
+                continue
+            if mtime == last_mtime:
+                continue
+            last_mtime = mtime
+
+            try:
+                new_config = parse_config(self.config_path)
+                with profiler.phase("search plan"):
+                    new_plan = self._build_plan(new_config)
+            except (ValueError, OSError, yaml.YAMLError) as e:
+                print(f"[red]Ignoring invalid config change, keeping the current one.[/]\n{e}")
+                continue
+            except Exception as e:
+                # The watcher must outlive any edit, or later changes would be silently ignored
+                print(f"[red]Failed to reload config, keeping the current one.[/]\n{e!r}")
+                continue
+
+            print(f"Config file {self.config_path} changed, reloading")
+            self._pending_config = (new_config, new_plan)
+            self._wake.set()
+
+    async def _apply_config(self, config: Config, plan: list[PlannedSearch]) -> None:
+        """Switch to a new config, keeping the state of the searches that didn't change."""
+        old_config = self.config
+        old_plan = self._plan
+        self.config = config
+        self._plan = {_search_key(s): s for s in plan}
+        now = asyncio.get_running_loop().time()
+
+        for key in old_plan.keys() - self._plan.keys():
+            print(f"Stopping search: {key[1]} in checker: {key[0]}")
+            del self._schedule[key]
+
+        search_fields = {"query", "filters", "notify"}
+        for key, search in self._plan.items():
+            old_search = old_plan.get(key)
+            if old_search is None:
+                print(f"Starting search: {key[1]} in checker: {key[0]}")
+                self._schedule[key] = now
+            elif old_search.config.model_dump(include=search_fields) != search.config.model_dump(
+                include=search_fields
+            ):
+                print(f"Restarting changed search: {key[1]} in checker: {key[0]}")
+                self._schedule[key] = now
+            else:
+                old_interval = self._interval(old_search, old_config)
+                new_interval = self._interval(search, config)
+                if old_interval != new_interval:
+                    print(
+                        f"Rescheduling search: {key[1]} in checker: {key[0]}"
+                        f" every {new_interval}s instead of {old_interval}s"
+                    )
+                    self._schedule[key] += new_interval - old_interval
+
+        if (old_config.deals, old_config.data_dir) != (config.deals, config.data_dir):
+            # Loaded again on the next report with the new settings
+            self._price_history = None
+
+        await self._sync_checkers(old_config)
+        if old_config.data_dir != config.data_dir:
+            self._cookie_store = CookieStore(config.data_dir)
+
+    async def _sync_checkers(self, old_config: Config) -> None:
+        """Drop the clients that are no longer used or whose settings changed."""
+        used_checkers = {search.checker_name for search in self._plan.values()}
+        client_changed = old_config.client != self.config.client
+
+        stale = [
+            name
+            for name in self._checkers
+            if client_changed
+            or name not in used_checkers
+            or old_config.checkers[name].backend != self.config.checkers[name].backend
+        ]
+        for checker_name in stale:
+            await self._close_checker(checker_name)
+
+        if client_changed and self._tab_pool is not None:
+            await self._tab_pool.close()
+            self._tab_pool = None
+
+    def _interval(self, search: PlannedSearch, config: Config) -> float:
+        return search.config.interval or config.run.interval
+
+    def _build_plan(self, config: Config) -> list[PlannedSearch]:
+        """Resolve the enabled searches of every enabled checker, merged with the global ones."""
         for c in self.AVAILABLE_CHECKERS:
-            if c in self.config.checkers:
+            if c in config.checkers:
                 continue
 
-            self.config.checkers[c] = CheckerConfig()
+            config.checkers[c] = CheckerConfig()
+
+        plan: list[PlannedSearch] = []
+        for checker_name, checker_cfg in config.checkers.items():
+            if not checker_cfg.enabled:
+                print(f"Skipping disabled checker: {checker_name}")
+                continue
 
-        http_clients: dict[str, HttpClient] = {}
-        async with asyncio.TaskGroup() as tg:
-            for checker_name, checker_cfg in self.config.checkers.items():
-                if not checker_cfg.enabled:
-                    print(f"Skipping disabled checker: {checker_name}")
+            if checker_name not in self.AVAILABLE_CHECKERS:
+                raise ValueError(f"Checker does not exist: {checker_name}")
+
+            merged_search = config.search | checker_cfg.search
+            for search_id, search_cfg in merged_search.items():
+                if not search_cfg.enabled:
+                    print(f"Skipping disabled search: {search_id} in checker: {checker_name}")
                     continue
 
-                checker_cls = self.AVAILABLE_CHECKERS.get(checker_name)
-                if not checker_cls:
-                    raise ValueError(f"Checker does not exist: {checker_name}")
-
-                http_client = HttpClient(self.config.client)
-                checker_instance = checker_cls(http_client)
-                http_clients[checker_name] = http_client
-
-                merged_search = self.config.search | checker_cfg.search
-                for search_id, search_cfg in merged_search.items():
-                    if not search_cfg.enabled:
-                        print(f"Skipping disabled search: {search_id} in checker: {checker_name}")
-                        continue
-
-                    if search_id in self.config.search:
-                        global_search_cfg = self.config.search[search_id]
-                        global_search_dict = global_search_cfg.model_dump()
-                        current_search_dict = search_cfg.model_dump(
-                            exclude={"enabled"},
-                            exclude_unset=True,
-                            exclude_defaults=True,
-                        )
-
-                        filters_merge: dict[str, Any] = global_search_dict["filters"]
-                        filters_merge.update(current_search_dict.get("filters", {}))
-
-                        search_merge = global_search_dict | current_search_dict
-                        search_merge["filters"] = filters_merge
-
-                        merged_config = SearchConfig(**search_merge)
-                    else:
-                        merged_config = search_cfg
-
-                    task = tg.create_task(
-                        checker_instance.get_products(merged_config.query, merged_config.filters)
+                if search_id in config.search:
+                    global_search_cfg = config.search[search_id]
+                    global_search_dict = global_search_cfg.model_dump()
+                    current_search_dict = search_cfg.model_dump(
+                        exclude={"enabled"},
+                        exclude_unset=True,
+                        exclude_defaults=True,
                     )
-                    tasks.append(task)
 
-        for client in http_clients.values():
-            await client.close()
+                    filters_merge: dict[str, Any] = global_search_dict["filters"] or {}
+                    filters_merge.update(current_search_dict.get("filters", {}))
 
-        found_products = list(itertools.chain.from_iterable(task.result() for task in tasks))
-        print(f"{found_products=}")
-        await TelegramNotifier().notify([p for p in found_products if p.in_stock])
+                    search_merge = global_search_dict | current_search_dict
+                    search_merge["filters"] = filters_merge
+
+                    merged_config = SearchConfig(**search_merge)
+                else:
+                    merged_config = search_cfg
+
+                plan.append(PlannedSearch(checker_name, search_id, merged_config))
+
+        return plan
+
+    async def _run_searches(self, plan: list[PlannedSearch]) -> list[SearchResult]:
+        """
+        Run every planned search concurrently, each one within its own deadline and all of
+        them within the cycle deadline. Searches that fail or time out don't affect the rest.
+        """
+        if not plan:
+            return []
+
+        start = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self._run_search(self._get_checker(s.checker_name), s))
+            for s in plan
+        ]
+        _, pending = await asyncio.wait(tasks, timeout=self.config.run.cycle_timeout)
+
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        cycle_elapsed = time.perf_counter() - start
+        results: list[SearchResult] = []
+        for search, task in zip(plan, tasks):
+            if task in pending:
+                print(
+                    f"Cycle deadline reached, cancelled search: {search.search_id}"
+                    f" in checker: {search.checker_name}"
+                )
+                results.append(SearchResult(search, SearchStatus.TIMEOUT, cycle_elapsed))
+            else:
+                results.append(task.result())
+        return results
+
+    async def _run_search(self, checker_instance: checker.Checker, search: PlannedSearch) -> SearchResult:
+        timeout = search.config.timeout or self.config.run.search_timeout
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(timeout):
+                products = await checker_instance.get_products(
+                    search.config.query, search.config.filters
+                )
+        except TimeoutError:
+            print(
+                f"Search {search.search_id} in checker {search.checker_name}"
+                f" timed out after {timeout}s"
+            )
+            return SearchResult(search, SearchStatus.TIMEOUT, time.perf_counter() - start)
+        except Exception as e:
+            print(f"Search {search.search_id} in checker {search.checker_name} failed: {e}")
+            return SearchResult(search, SearchStatus.ERROR, time.perf_counter() - start, error=e)
+
+        return SearchResult(search, SearchStatus.OK, time.perf_counter() - start, products)
+
+    def _print_summary(self, results: list[SearchResult]) -> None:
+        table = Table(title="Search summary")
+        table.add_column("Checker")
+        table.add_column("Search")
+        table.add_column("Status")
+        table.add_column("Products", justify="right")
+        table.add_column("Time (s)", justify="right")
+
+        status_styles = {
+            SearchStatus.OK: "green",
+            SearchStatus.TIMEOUT: "yellow",
+            SearchStatus.ERROR: "red",
+        }
+        for r in results:
+            table.add_row(
+                r.search.checker_name,
+                r.search.search_id,
+                f"[{status_styles[r.status]}]{r.status}[/]",
+                str(len(r.products)),
+                f"{r.elapsed:.2f}",
+            )
+        print(table)
+
+        timed_out = [r.search for r in results if r.status == SearchStatus.TIMEOUT]
+        if timed_out:
+            print(
+                f"{len(timed_out)}/{len(results)} searches timed out: "
+                + ", ".join(f"{s.checker_name}/{s.search_id}" for s in timed_out)
+            )
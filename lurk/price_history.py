@@ -0,0 +1,133 @@
+import os
+import time
+
+from bisect import bisect_left, insort
+from collections import deque
+from pathlib import Path
+from rich import print
+
+from lurk.config import DealConfig
+
+
+class PriceSeries:
+    """
+    Fixed-size window of the latest (timestamp, price) entries of a product. A sorted copy of
+    the prices is kept up to date on every insert, so the minimum and any percentile can be read
+    directly.
+    """
+
+    __slots__ = ("_window", "_sorted")
+
+    def __init__(self, size: int) -> None:
+        self._window: deque[tuple[float, float]] = deque(maxlen=size)
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def add(self, price: float, at: float) -> None:
+        if len(self._window) == self._window.maxlen:
+            _, oldest_price = self._window[0]
+            del self._sorted[bisect_left(self._sorted, oldest_price)]
+        self._window.append((at, price))
+        insort(self._sorted, price)
+
+    @property
+    def minimum(self) -> float:
+        return self._sorted[0]
+
+    @property
+    def median(self) -> float:
+        return self.percentile(50)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the prices in the window."""
+        index = min(len(self._sorted) - 1, max(0, int(len(self._sorted) * p / 100 + 0.5) - 1))
+        return self._sorted[index]
+
+    def entries(self) -> list[tuple[float, float]]:
+        return list(self._window)
+
+
+class PriceHistory:
+    """
+    Price history of every product, indexed by product key. Prices are appended to a log file
+    and only the latest window of each product is kept in memory.
+    """
+
+    FILE_NAME = "prices.log"
+    # The log is compacted once it's this many times bigger than what's kept in memory
+    COMPACT_RATIO = 4
+
+    def __init__(self, data_dir: Path, config: DealConfig) -> None:
+        self.path = data_dir.expanduser() / self.FILE_NAME
+        self._config = config
+        self._series: dict[str, PriceSeries] = {}
+        self._pending: list[str] = []
+        # Lines currently in the log file, to know when it's worth compacting
+        self._log_lines = 0
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                self._log_lines += 1
+                try:
+                    key, at, price = line.rstrip("\n").split("\t")
+                    self._get_series(key).add(float(price), float(at))
+                except ValueError:
+                    print(f"Skipping malformed price history line: {line!r}")
+
+        self._compact_if_needed()
+
+    def _get_series(self, key: str) -> PriceSeries:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = PriceSeries(self._config.window)
+        return series
+
+    def is_deal(self, key: str, price: float) -> bool:
+        """Check a price against the history of the product, without recording it."""
+        series = self._series.get(key)
+        if series is None or len(series) < self._config.min_samples:
+            return False
+
+        if price < series.percentile(self._config.percentile):
+            return True
+        drop = self._config.drop_threshold
+        return drop is not None and price <= series.median * (1 - drop)
+
+    def record(self, key: str, price: float, at: float | None = None) -> None:
+        at = time.time() if at is None else at
+        self._get_series(key).add(price, at)
+        self._pending.append(f"{key}\t{at:.0f}\t{price}\n")
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(self._pending)
+        self._log_lines += len(self._pending)
+        self._pending.clear()
+        self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        kept = sum(len(s) for s in self._series.values())
+        if self._log_lines > kept * self.COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log with only the prices that are still in memory."""
+        print(f"Compacting price history {self.path}")
+        tmp_path = self.path.with_suffix(".tmp")
+        lines = 0
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for key, series in self._series.items():
+                entries = series.entries()
+                file.writelines(f"{key}\t{at:.0f}\t{price}\n" for at, price in entries)
+                lines += len(entries)
+        os.replace(tmp_path, self.path)
+        self._log_lines = lines
@@ -0,0 +1,88 @@
+import cProfile
+import time
+
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from rich import print
+from rich.table import Table
+
+
+class Profiler:
+    """
+    Collects how much time is spent in each phase of a cycle. It does nothing until it's
+    enabled, so phases can be measured anywhere without slowing down regular runs.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.dump_path: Path | None = None
+        self._totals: dict[str, float] = defaultdict(float)
+        self._counts: dict[str, int] = defaultdict(int)
+        self._dumped = False
+
+    def add(self, name: str, elapsed: float) -> None:
+        self._totals[name] += elapsed
+        self._counts[name] += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """
+        Measure a whole cycle and print the breakdown of its phases. The first profiled cycle is
+        also dumped with cProfile when a dump path is set.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        cprofile: cProfile.Profile | None = None
+        if self.dump_path and not self._dumped:
+            cprofile = cProfile.Profile()
+            cprofile.enable()
+        try:
+            with self.phase("cycle"):
+                yield
+        finally:
+            if cprofile:
+                cprofile.disable()
+                assert self.dump_path is not None
+                cprofile.dump_stats(self.dump_path)
+                self._dumped = True
+                print(f"cProfile stats written to {self.dump_path}")
+            self.print_report()
+            self.reset()
+
+    def reset(self) -> None:
+        self._totals.clear()
+        self._counts.clear()
+
+    def print_report(self) -> None:
+        table = Table(
+            title="Profile",
+            caption="Phases run concurrently, so their times can add up to more than the cycle",
+        )
+        table.add_column("Phase")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total (s)", justify="right")
+        table.add_column("Mean (ms)", justify="right")
+
+        for name, total in self._totals.items():
+            count = self._counts[name]
+            table.add_row(name, str(count), f"{total:.3f}", f"{total / count * 1000:.1f}")
+        print(table)
+
+
+profiler = Profiler()
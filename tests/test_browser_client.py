@@ -0,0 +1,275 @@
+import asyncio
+import json
+import subprocess
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+
+from aiohttp import web
+from nodriver import cdp
+from nodriver.core.config import find_chrome_executable  # type: ignore[import-untyped]
+from nodriver.core.tab import Tab  # type: ignore[import-untyped]
+
+from lurk.browser_client import BrowserHttpClient, PooledTab, TabPool
+from lurk.config import ClientConfig
+from lurk.http_client import TextResponse
+
+
+def _chrome_available() -> bool:
+    try:
+        chrome = find_chrome_executable()
+        subprocess.run([chrome, "--version"], check=True, capture_output=True, timeout=10)
+    except (FileNotFoundError, OSError, subprocess.SubprocessError):
+        return False
+    return True
+
+
+requires_chrome = pytest.mark.skipif(not _chrome_available(), reason="Chrome is not available")
+
+PAGE = """
+<html>
+  <body>
+    <img src="/image.png">
+    <div id="content">static</div>
+    <script>document.getElementById("content").textContent = "rendered by js";</script>
+  </body>
+</html>
+"""
+
+
+@asynccontextmanager
+async def _store(requested: list[str]) -> AsyncIterator[str]:
+    """Local stand-in for a store that needs JavaScript, recording every path it's asked for."""
+
+    async def page(request: web.Request) -> web.Response:
+        requested.append(request.path)
+        return web.Response(text=PAGE, content_type="text/html")
+
+    async def image(request: web.Request) -> web.Response:
+        requested.append(request.path)
+        return web.Response(body=b"\x89PNG", content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    app.router.add_get("/image.png", image)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+TARGET_INFO = {
+    "targetId": "target",
+    "type": "page",
+    "title": "",
+    "url": "about:blank",
+    "attached": True,
+    "canAccessOpener": False,
+}
+
+DEVTOOLS_RESULTS: dict[str, dict[str, Any]] = {
+    "Page.navigate": {"frameId": "frame", "loaderId": "loader"},
+    "Target.getTargetInfo": {"targetInfo": TARGET_INFO},
+    "DOM.getDocument": {
+        "root": {
+            "nodeId": 1,
+            "backendNodeId": 1,
+            "nodeType": 9,
+            "nodeName": "#document",
+            "localName": "",
+            "nodeValue": "",
+        }
+    },
+    "DOM.getOuterHTML": {"outerHTML": PAGE},
+    "Target.closeTarget": {"success": True},
+}
+
+# What Chrome sends while loading PAGE with images blocked: the image request is paused before
+# the page is considered loaded
+NAVIGATION_EVENTS: list[dict[str, Any]] = [
+    {
+        "method": "Network.responseReceived",
+        "params": {
+            "requestId": "document",
+            "loaderId": "loader",
+            "timestamp": 0,
+            "type": "Document",
+            "response": {
+                "url": "https://store.test/",
+                "status": 200,
+                "statusText": "OK",
+                "headers": {},
+                "mimeType": "text/html",
+                "charset": "utf-8",
+                "connectionReused": False,
+                "connectionId": 0,
+                "encodedDataLength": 0,
+                "securityState": "secure",
+            },
+            "hasExtraInfo": False,
+        },
+    },
+    {
+        "method": "Fetch.requestPaused",
+        "params": {
+            "requestId": "image",
+            "request": {
+                "url": "https://store.test/image.png",
+                "method": "GET",
+                "headers": {},
+                "initialPriority": "Low",
+                "referrerPolicy": "strict-origin-when-cross-origin",
+            },
+            "frameId": "frame",
+            "resourceType": "Image",
+        },
+    },
+    {"method": "Page.loadEventFired", "params": {"timestamp": 0}},
+]
+
+
+@asynccontextmanager
+async def _devtools(received: list[str]) -> AsyncIterator[str]:
+    """Minimal stand-in for the DevTools websocket of a tab, recording every command it gets."""
+
+    async def connection(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            command = json.loads(message.data)
+            received.append(command["method"])
+            await ws.send_json(
+                {"id": command["id"], "result": DEVTOOLS_RESULTS.get(command["method"], {})}
+            )
+            if command["method"] == "Page.navigate":
+                for event in NAVIGATION_EVENTS:
+                    await ws.send_json(event)
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/devtools/page/target", connection)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"ws://127.0.0.1:{port}/devtools/page/target"
+    finally:
+        await runner.cleanup()
+
+
+async def _get_pages(client: BrowserHttpClient, count: int) -> list[TextResponse]:
+    return [await client.get("/") for _ in range(count)]
+
+
+def _client_config() -> ClientConfig:
+    return ClientConfig.model_validate(
+        {"browser": {"pool-size": 1, "max-pages-per-tab": 2, "render-delay": 0.2}}
+    )
+
+
+@requires_chrome
+def test_returns_rendered_dom_without_loading_images() -> None:
+    async def run() -> None:
+        requested: list[str] = []
+        async with _store(requested) as base_url, TabPool(_client_config().browser) as pool:
+            client = BrowserHttpClient(_client_config(), pool).set_base_url(base_url)
+            resp = await client.get("/")
+
+        assert resp.ok
+        assert "rendered by js" in resp.content
+        assert "/" in requested
+        assert "/image.png" not in requested
+
+    asyncio.run(run())
+
+
+@requires_chrome
+def test_tab_keeps_serving_pages_after_blocking_resources() -> None:
+    async def run() -> None:
+        async with _store([]) as base_url, TabPool(_client_config().browser) as pool:
+            client = BrowserHttpClient(_client_config(), pool).set_base_url(base_url)
+            for _ in range(2):
+                resp = await asyncio.wait_for(client.get("/"), 10)
+                assert "rendered by js" in resp.content
+
+    asyncio.run(run())
+
+
+def test_blocked_requests_do_not_block_the_tab() -> None:
+    async def run() -> None:
+        received: list[str] = []
+        async with _devtools(received) as ws_url, TabPool(_client_config().browser) as pool:
+            pooled = PooledTab(Tab(ws_url, cdp.target.TargetInfo.from_json(TARGET_INFO)))
+            try:
+                await pooled.setup(["Image"])
+                pool._idle.put_nowait(pooled)
+                client = BrowserHttpClient(_client_config(), pool)
+                client.set_base_url("https://store.test")
+
+                # The same tab serves both pages, after failing the image request of the first.
+                # A blocked tab can't even be discarded, so the pages are awaited in a task that's
+                # left behind instead of cancelled if they never arrive
+                pages = asyncio.create_task(_get_pages(client, 2))
+                done, _ = await asyncio.wait({pages}, timeout=10)
+                assert done, "The tab stopped answering after a blocked request"
+                for resp in pages.result():
+                    assert resp.status_code == 200
+                    assert "<img" in resp.content
+            finally:
+                await pooled.tab.aclose()
+
+        assert received.count("Fetch.failRequest") == 2
+        # The tab was closed after max-pages-per-tab pages
+        assert received[-1] == "Target.closeTarget"
+
+    asyncio.run(run())
+
+
+@requires_chrome
+def test_recycles_tabs_after_max_pages() -> None:
+    async def run() -> None:
+        async with _store([]) as base_url, TabPool(_client_config().browser) as pool:
+            client = BrowserHttpClient(_client_config(), pool).set_base_url(base_url)
+
+            await client.get("/")
+            first_tab = pool._idle.get_nowait()
+            pool._idle.put_nowait(first_tab)
+
+            await client.get("/")
+            # The tab served max-pages-per-tab pages, so it was closed instead of kept
+            assert pool._idle.empty()
+            browser = await pool._get_browser()
+            await browser.update_targets()
+            target_ids = {t.target.target_id for t in browser.targets}
+            assert first_tab.tab.target.target_id not in target_ids
+
+            await client.get("/")
+            second_tab = pool._idle.get_nowait()
+            assert second_tab is not first_tab
+            assert second_tab.pages_served == 1
+
+    asyncio.run(run())
+
+
+@requires_chrome
+def test_failed_navigation_is_an_error() -> None:
+    async def run() -> None:
+        async with _store([]) as base_url:
+            pass
+        # The store is gone, so the connection is refused
+        async with TabPool(_client_config().browser) as pool:
+            client = BrowserHttpClient(_client_config(), pool).set_base_url(base_url)
+            with pytest.raises(ConnectionError):
+                await client.get("/")
+
+    asyncio.run(run())
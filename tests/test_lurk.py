@@ -0,0 +1,186 @@
+import asyncio
+import os
+import yaml
+
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from lurk.config import SearchFilters, parse_config
+from lurk.http_client import HttpClient
+from lurk.lurk import Lurk, SearchResult
+from lurk.models import Product
+
+
+class StubChecker:
+    """Checker that finds nothing, without any network access."""
+
+    def __init__(self, http_client: HttpClient):
+        self.http_client = http_client
+
+    async def get_products(
+        self, search: str, filters: SearchFilters | None = None
+    ) -> list[Product]:
+        return []
+
+
+class StubLurk(Lurk):
+    """Lurk with a single stub checker, collecting results instead of notifying them."""
+
+    CONFIG_POLL_INTERVAL = 0.02
+
+    def __init__(self, config_path: Path):
+        super().__init__(parse_config(config_path), config_path)
+        self.AVAILABLE_CHECKERS = {"stub": StubChecker}
+        self.results: list[SearchResult] = []
+        self.closed_checkers: list[str] = []
+
+    async def _report(self, results: list[SearchResult]) -> None:
+        self.results.extend(results)
+
+    async def _close_checker(self, checker_name: str) -> None:
+        await super()._close_checker(checker_name)
+        self.closed_checkers.append(checker_name)
+
+    def runs(self, search_id: str) -> int:
+        return sum(r.search.search_id == search_id for r in self.results)
+
+
+def _config(tmp_path: Path, search: dict[str, Any], **extra: Any) -> dict[str, Any]:
+    return {
+        "search": search,
+        "data-dir": str(tmp_path),
+        "client": {"persist-cookies": False},
+        **extra,
+    }
+
+
+def _write_config(path: Path, data: Any) -> None:
+    previous_mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(data if isinstance(data, str) else yaml.safe_dump(data), encoding="utf-8")
+    # Edits can land within the resolution of the file system's timestamps
+    mtime = max(path.stat().st_mtime_ns, previous_mtime + 1_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+async def _eventually(condition: Callable[[], bool], timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def _idle_polls(app: StubLurk) -> None:
+    """Give the watcher time to see (and reject) the last edit."""
+    await asyncio.sleep(app.CONFIG_POLL_INTERVAL * 10)
+
+
+@asynccontextmanager
+async def _watching(config_path: Path) -> AsyncIterator[StubLurk]:
+    app = StubLurk(config_path)
+    task = asyncio.create_task(app.watch())
+    try:
+        yield app
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def _plan(app: StubLurk) -> dict[str, str]:
+    return {search_id: search.config.query for (_, search_id), search in app._plan.items()}
+
+
+def test_starts_stops_and_restarts_changed_searches(tmp_path: Path) -> None:
+    async def run() -> None:
+        config_path = tmp_path / "config.yaml"
+        _write_config(config_path, _config(tmp_path, {"a": {"query": "a"}, "b": {"query": "b"}}))
+
+        async with _watching(config_path) as app:
+            await _eventually(lambda: app.runs("a") == 1 and app.runs("b") == 1)
+
+            changed = {"a": {"query": "a"}, "b": {"query": "b2"}, "c": {"query": "c"}}
+            _write_config(config_path, _config(tmp_path, changed))
+            await _eventually(lambda: app.runs("c") == 1 and app.runs("b") == 2)
+            assert app.runs("a") == 1
+
+            _write_config(config_path, _config(tmp_path, {"c": {"query": "c"}}))
+            await _eventually(lambda: _plan(app) == {"c": "c"})
+            assert set(app._schedule) == {("stub", "c")}
+
+        assert (app.runs("a"), app.runs("b"), app.runs("c")) == (1, 2, 1)
+
+    asyncio.run(run())
+
+
+def test_reschedules_searches_whose_interval_changed(tmp_path: Path) -> None:
+    async def run() -> None:
+        config_path = tmp_path / "config.yaml"
+        _write_config(config_path, _config(tmp_path, {"a": {"query": "a", "interval": 100}}))
+
+        async with _watching(config_path) as app:
+            await _eventually(lambda: app.runs("a") == 1)
+            next_run = app._schedule[("stub", "a")]
+
+            _write_config(config_path, _config(tmp_path, {"a": {"query": "a", "interval": 300}}))
+            await _eventually(lambda: app.config.search["a"].interval == 300)
+
+            assert app._schedule[("stub", "a")] == pytest.approx(next_run + 200)
+            assert app.runs("a") == 1
+
+    asyncio.run(run())
+
+
+def test_resets_clients_when_client_settings_change(tmp_path: Path) -> None:
+    async def run() -> None:
+        config_path = tmp_path / "config.yaml"
+        _write_config(config_path, _config(tmp_path, {"a": {"query": "a"}}))
+
+        async with _watching(config_path) as app:
+            await _eventually(lambda: app.runs("a") == 1)
+            old_checker = app._checkers["stub"]
+
+            # A search change alone keeps the warm client
+            _write_config(config_path, _config(tmp_path, {"a": {"query": "a2"}}))
+            await _eventually(lambda: app.runs("a") == 2)
+            assert app._checkers["stub"] is old_checker
+            assert app.closed_checkers == []
+
+            data = _config(tmp_path, {"a": {"query": "a2"}})
+            data["client"]["headers"] = {"x-test": "1"}
+            _write_config(config_path, data)
+            await _eventually(lambda: app.closed_checkers == ["stub"])
+            assert "stub" not in app._checkers
+            assert app.runs("a") == 2
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "invalid",
+    [
+        "search:\n  a: {}\n",  # Fails validation
+        "search: [\n",  # Not YAML
+        "search\n",  # Valid YAML, but not a mapping
+        "- search\n",
+    ],
+)
+def test_rejects_invalid_edits_and_keeps_watching(tmp_path: Path, invalid: str) -> None:
+    async def run() -> None:
+        config_path = tmp_path / "config.yaml"
+        _write_config(config_path, _config(tmp_path, {"a": {"query": "a"}}))
+
+        async with _watching(config_path) as app:
+            await _eventually(lambda: app.runs("a") == 1)
+
+            _write_config(config_path, invalid)
+            await _idle_polls(app)
+            assert _plan(app) == {"a": "a"}
+
+            valid = _config(tmp_path, {"a": {"query": "a"}, "b": {"query": "b"}})
+            _write_config(config_path, valid)
+            await _eventually(lambda: app.runs("b") == 1)
+            assert _plan(app) == {"a": "a", "b": "b"}
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from lurk.config import DealConfig
+from lurk.price_history import PriceHistory
+
+
+def _history(data_dir: Path) -> PriceHistory:
+    return PriceHistory(data_dir, DealConfig.model_validate({"window": 5, "min-samples": 3}))
+
+
+def _log_lines(history: PriceHistory) -> list[str]:
+    return history.path.read_text(encoding="utf-8").splitlines()
+
+
+def test_compaction_keeps_original_timestamps(tmp_path: Path) -> None:
+    history = _history(tmp_path)
+    for i in range(25):
+        history.record("best-buy:123", 100 + i, at=1000 + i)
+    history.flush()
+
+    reloaded = _history(tmp_path)
+    reloaded.load()
+
+    assert _log_lines(reloaded) == [f"best-buy:123\t{1020 + i}\t{120 + i}" for i in range(5)]
+
+
+def test_flush_compacts_a_growing_log(tmp_path: Path) -> None:
+    history = _history(tmp_path)
+    history.load()
+    for cycle in range(100):
+        history.record("best-buy:123", 100, at=cycle)
+        history.record("best-buy:456", 200, at=cycle)
+        history.flush()
+        # Two products with a window of 5 never need more than 4 times that many lines
+        assert len(_log_lines(history)) <= 2 * 5 * PriceHistory.COMPACT_RATIO
+
+    reloaded = _history(tmp_path)
+    reloaded.load()
+    assert len(_log_lines(reloaded)) <= 2 * 5 * PriceHistory.COMPACT_RATIO
+
+
+def test_deal_against_history(tmp_path: Path) -> None:
+    history = _history(tmp_path)
+    for price in (100, 102, 98, 101, 99):
+        history.record("best-buy:123", price)
+
+    assert not history.is_deal("best-buy:123", 99)
+    assert history.is_deal("best-buy:123", 97)
+    assert history.is_deal("best-buy:unknown", 1) is False